@@ -5,16 +5,36 @@ Provides price prediction endpoints using XGBoost model
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Optional, Dict, Any, Tuple, Annotated
+from functools import lru_cache
+from itertools import compress
 import numpy as np
 import pandas as pd
 import joblib
 import logging
 from datetime import datetime
 import os
+import sys
+import threading
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+import multiprocessing
+import hashlib
+import tempfile
 from pathlib import Path
 
+try:
+    import treelite
+    import tl2cgen
+except ImportError:
+    # Treelite is optional; predictions then go through the XGBoost booster
+    treelite = tl2cgen = None
+
+from training.jit import njit
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,6 +59,47 @@ model = None
 preprocessor = None
 feature_names = None
 
+# Maximum number of cached predictions per pricing method
+PREDICTION_CACHE_SIZE = 8192
+
+# Single-row encoding plan extracted from the fitted preprocessor
+_NUM_COLS = None     # (ProductData.as_array index, output index, mean, scale) arrays
+_STRICT_CAT_COLS = None  # categorical columns that reject unknown values
+_CAT_MAPS = None     # {column: {value: output index}}
+_ONEHOT_IDX = None   # output indices of all one-hot slots
+_CODE_COLS = None    # {column: (output index, {value: code})} for native categorical models
+_N_FEATURES = None
+_buffers = threading.local()
+
+# Native XGBoost booster and the tree range the sklearn wrapper would predict with
+_BOOSTER = None
+_ITERATION_RANGE = (0, 0)
+
+# Treelite-compiled predictor for the loaded booster, when available
+_COMPILED_PREDICTOR = None
+COMPILED_MODEL_DIR = Path("models")
+
+# Worker processes for CPU-bound prediction work (started with the app)
+_POOL = None
+_POOL_RESTARTS = 0
+POOL_PROBE_TIMEOUT_SECONDS = 2.0
+
+# Response timestamp, refreshed by a background task while the app is running
+_NOW_ISO = ''
+TIMESTAMP_REFRESH_SECONDS = 0.5
+_timestamp_task = None
+
+# Dynamic micro-batching of concurrent single-product predictions
+MAX_BATCH = 64
+MAX_WAIT_MS = 5
+
+# Feature layout used by manual preprocessing
+_NUMERIC_FEATURES = ['current_price', 'days_to_expiry', 'stock_level', 'demand_score', 'historical_sales']
+_CATEGORIES = ['bakery', 'dairy', 'fruits', 'meat', 'other', 'seafood', 'vegetables']
+_DAYS = ['friday', 'monday', 'saturday', 'sunday', 'thursday', 'tuesday', 'wednesday']
+_CAT_IDX = {sys.intern(cat): i for i, cat in enumerate(_CATEGORIES)}
+_DAY_IDX = {sys.intern(day): i for i, day in enumerate(_DAYS)}
+
 class ProductData(BaseModel):
     """Product data model for price prediction"""
     current_price: float = Field(..., gt=0, description="Current price of the product")
@@ -48,11 +109,70 @@ class ProductData(BaseModel):
     category: str = Field(..., description="Product category")
     historical_sales: float = Field(default=0, ge=0, description="Historical sales data")
     day_of_week: str = Field(default="monday", description="Day of the week")
+    
+    @field_validator('category', 'day_of_week')
+    @classmethod
+    def normalize_label(cls, v: str) -> str:
+        """Lowercase and intern categorical labels once at ingress"""
+        return sys.intern(v.lower())
+    
+    def as_array(self, dtype=np.float32) -> np.ndarray:
+        """Numeric features as a 1-D array in _NUMERIC_FEATURES order"""
+        return np.array([
+            self.current_price,
+            self.days_to_expiry,
+            self.stock_level,
+            self.demand_score,
+            self.historical_sales
+        ], dtype=dtype)
 
 class BatchPredictRequest(BaseModel):
     """Batch prediction request model"""
     products: List[ProductData]
 
+class BatchPredictColumnarRequest(BaseModel):
+    """Columnar batch prediction request model (one list per product field)"""
+    current_price: List[Annotated[float, Field(gt=0)]]
+    days_to_expiry: List[int]
+    stock_level: List[Annotated[int, Field(ge=0)]]
+    demand_score: List[Annotated[float, Field(ge=0, le=1)]]
+    category: List[str]
+    historical_sales: Optional[List[Annotated[float, Field(ge=0)]]] = None
+    day_of_week: Optional[List[str]] = None
+    
+    @field_validator('category', 'day_of_week')
+    @classmethod
+    def normalize_labels(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        """Lowercase and intern categorical labels once at ingress"""
+        if v is None:
+            return v
+        return [sys.intern(label.lower()) for label in v]
+    
+    @model_validator(mode='after')
+    def check_lengths(self):
+        """Ensure every provided column has one value per product"""
+        n = len(self.current_price)
+        for name in ('days_to_expiry', 'stock_level', 'demand_score', 'category',
+                     'historical_sales', 'day_of_week'):
+            values = getattr(self, name)
+            if values is not None and len(values) != n:
+                raise ValueError(f"'{name}' has {len(values)} values, expected {n}")
+        return self
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Materialize the columns as typed arrays in a feature DataFrame"""
+        n = len(self.current_price)
+        return pd.DataFrame({
+            'current_price': np.asarray(self.current_price, dtype=np.float64),
+            'days_to_expiry': np.asarray(self.days_to_expiry, dtype=np.int64),
+            'stock_level': np.asarray(self.stock_level, dtype=np.int64),
+            'demand_score': np.asarray(self.demand_score, dtype=np.float64),
+            'historical_sales': (np.asarray(self.historical_sales, dtype=np.float64)
+                                 if self.historical_sales is not None else np.zeros(n)),
+            'category': self.category,
+            'day_of_week': self.day_of_week if self.day_of_week is not None else ['monday'] * n
+        })
+
 class PredictionResponse(BaseModel):
     """Price prediction response model"""
     recommended_price: float
@@ -77,6 +197,7 @@ def load_model():
         features_path = Path("models/feature_names.joblib")
         
         if model_path.exists() and preprocessor_path.exists():
+            # Both artifacts are lz4-compressed, which joblib cannot memory-map
             model = joblib.load(model_path)
             preprocessor = joblib.load(preprocessor_path)
             
@@ -93,6 +214,7 @@ def load_model():
                     'day_of_week_thursday', 'day_of_week_tuesday', 'day_of_week_wednesday'
                 ]
             
+            _prepare_inference()
             logger.info("Model and preprocessor loaded successfully")
             return True
         else:
@@ -104,9 +226,212 @@ def load_model():
         logger.error(f"Error loading model: {e}")
         return False
 
+def _prepare_inference():
+    """Refresh derived inference state after the model or preprocessor changes"""
+    global _BOOSTER, _ITERATION_RANGE, _COMPILED_PREDICTOR
+    
+    _BOOSTER = None
+    _ITERATION_RANGE = (0, 0)
+    _COMPILED_PREDICTOR = None
+    
+    if hasattr(model, 'get_booster'):
+        _BOOSTER = model.get_booster()
+        # Single-threaded prediction keeps latency predictable across uvicorn workers
+        _BOOSTER.set_param({'nthread': 1})
+        try:
+            _ITERATION_RANGE = (0, model.best_iteration + 1)
+        except AttributeError:
+            pass
+        _COMPILED_PREDICTOR = _load_compiled_predictor(_BOOSTER)
+    
+    _build_encoding_plan()
+    clear_prediction_caches()
+
+def _load_compiled_predictor(booster):
+    """Compile the booster to a native shared library with Treelite, reusing cached builds"""
+    if treelite is None:
+        return None
+    
+    try:
+        if _ITERATION_RANGE != (0, 0):
+            booster = booster[_ITERATION_RANGE[0]:_ITERATION_RANGE[1]]
+        
+        # Key the compiled library by the model contents so retraining invalidates it
+        digest = hashlib.sha256(bytes(booster.save_raw(raw_format='ubj'))).hexdigest()[:16]
+        libpath = COMPILED_MODEL_DIR / f"xgboost_pricing_model_{digest}.so"
+        
+        if not libpath.exists():
+            logger.info("Compiling model with Treelite...")
+            os.makedirs(COMPILED_MODEL_DIR, exist_ok=True)
+            compiled_model = treelite.frontend.from_xgboost(booster)
+            
+            # Build under a unique name and rename it into place, so concurrent
+            # uvicorn workers never load a partially written library
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{libpath.stem}.", suffix=".so", dir=COMPILED_MODEL_DIR)
+            os.close(fd)
+            try:
+                tl2cgen.export_lib(compiled_model, toolchain="gcc", libpath=tmp_path,
+                                   params={"parallel_comp": os.cpu_count() or 1})
+                os.replace(tmp_path, libpath)
+            finally:
+                with suppress(FileNotFoundError):
+                    os.unlink(tmp_path)
+        
+        predictor = tl2cgen.Predictor(str(libpath), nthread=1)
+        logger.info(f"Loaded compiled model from {libpath}")
+        return predictor
+        
+    except Exception as e:
+        logger.warning(f"Treelite compilation unavailable, using XGBoost booster: {e}")
+        return None
+
+def _model_predict(processed_data: np.ndarray) -> np.ndarray:
+    """Predict with the fastest available backend for the loaded model"""
+    # XGBoost works in float32 internally; convert once up front
+    features = np.ascontiguousarray(processed_data, dtype=np.float32)
+    
+    if _COMPILED_PREDICTOR is not None:
+        return _COMPILED_PREDICTOR.predict(tl2cgen.DMatrix(features)).reshape(-1)
+    if _BOOSTER is None:
+        return model.predict(features)
+    # Native booster avoids a DMatrix copy per call
+    return _BOOSTER.inplace_predict(features, iteration_range=_ITERATION_RANGE)
+
+def _build_encoding_plan():
+    """Extract scaler statistics and one-hot slots from the fitted preprocessor"""
+    global _NUM_COLS, _STRICT_CAT_COLS, _CAT_MAPS, _ONEHOT_IDX, _CODE_COLS, _N_FEATURES
+    
+    _NUM_COLS = _STRICT_CAT_COLS = _CAT_MAPS = _ONEHOT_IDX = _CODE_COLS = _N_FEATURES = None
+    
+    try:
+        if isinstance(preprocessor, dict):
+            _build_dict_encoding_plan()
+            return
+        
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder
+        
+        num_cols, strict_cols, cat_maps, onehot_idx = [], [], {}, []
+        
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == 'drop':
+                continue
+            out = preprocessor.output_indices_[name]
+            
+            if isinstance(transformer, StandardScaler):
+                means = transformer.mean_ if transformer.mean_ is not None else np.zeros(len(columns))
+                scales = transformer.scale_ if transformer.scale_ is not None else np.ones(len(columns))
+                for j, col in enumerate(columns):
+                    num_cols.append((_NUMERIC_FEATURES.index(col), out.start + j, means[j], scales[j]))
+            elif isinstance(transformer, OneHotEncoder) and not getattr(transformer, '_infrequent_enabled', False):
+                pos = out.start
+                for j, col in enumerate(columns):
+                    drop_idx = transformer.drop_idx_[j] if transformer.drop_idx_ is not None else None
+                    cat_maps[col] = {}
+                    for k, value in enumerate(transformer.categories_[j]):
+                        if k == drop_idx:
+                            # Dropped category encodes as all zeros
+                            cat_maps[col][value] = None
+                            continue
+                        cat_maps[col][value] = pos
+                        onehot_idx.append(pos)
+                        pos += 1
+                    if transformer.handle_unknown == 'error':
+                        strict_cols.append(col)
+            else:
+                logger.info(f"Fast preprocessing disabled: unsupported transformer '{name}'")
+                return
+        
+        src_idx, out_idx, means, scales = zip(*num_cols)
+        _NUM_COLS = (np.array(src_idx, dtype=np.intp), np.array(out_idx, dtype=np.intp),
+                     np.array(means, dtype=np.float64), np.array(scales, dtype=np.float64))
+        _STRICT_CAT_COLS, _CAT_MAPS = strict_cols, cat_maps
+        _ONEHOT_IDX = np.array(onehot_idx, dtype=np.intp)
+        _CODE_COLS = {}
+        _N_FEATURES = max(out.stop for out in preprocessor.output_indices_.values())
+        
+    except Exception as e:
+        logger.info(f"Fast preprocessing disabled: {e}")
+        _NUM_COLS = _STRICT_CAT_COLS = _CAT_MAPS = _ONEHOT_IDX = _CODE_COLS = _N_FEATURES = None
+
+def _build_dict_encoding_plan():
+    """Encoding plan for the plain-dict preprocessor written by the training module"""
+    global _NUM_COLS, _STRICT_CAT_COLS, _CAT_MAPS, _ONEHOT_IDX, _CODE_COLS, _N_FEATURES
+    
+    numeric_features = preprocessor['numeric_features']
+    n_num = len(numeric_features)
+    _NUM_COLS = (np.array([_NUMERIC_FEATURES.index(col) for col in numeric_features], dtype=np.intp),
+                 np.arange(n_num, dtype=np.intp),
+                 np.asarray(preprocessor['mean'], dtype=np.float64),
+                 np.asarray(preprocessor['std'], dtype=np.float64))
+    
+    if preprocessor.get('categorical_encoding') == 'native':
+        # Label codes follow the numeric columns, one column each
+        _CODE_COLS = {
+            'category': (n_num, preprocessor['cat_to_idx']),
+            'day_of_week': (n_num + 1, preprocessor['dow_to_idx'])
+        }
+        _STRICT_CAT_COLS, _CAT_MAPS = [], {}
+        _ONEHOT_IDX = np.empty(0, dtype=np.intp)
+        _N_FEATURES = n_num + 2
+        return
+    
+    # One-hot blocks follow the numeric columns, each dropping its first label
+    cat_maps, pos = {}, n_num
+    for col, key in (('category', 'cat_to_idx'), ('day_of_week', 'dow_to_idx')):
+        mapping = preprocessor[key]
+        cat_maps[col] = {value: pos + idx - 1 if idx > 0 else None for value, idx in mapping.items()}
+        pos += len(mapping) - 1
+    
+    _STRICT_CAT_COLS, _CAT_MAPS = list(cat_maps), cat_maps
+    _ONEHOT_IDX = np.arange(n_num, pos, dtype=np.intp)
+    _CODE_COLS = {}
+    _N_FEATURES = pos
+
+def _apply_preprocessor(data: pd.DataFrame) -> np.ndarray:
+    """Transform a feature DataFrame with the loaded preprocessor"""
+    if isinstance(preprocessor, dict):
+        from training.train_model import transform_features
+        return transform_features(data, preprocessor)
+    return preprocessor.transform(data)
+
+def _fast_preprocess(product_data: ProductData) -> np.ndarray:
+    """Encode a single product directly into a reusable (1, F) float32 buffer"""
+    buf = getattr(_buffers, 'features', None)
+    if buf is None or buf.shape[1] != _N_FEATURES:
+        buf = np.zeros((1, _N_FEATURES), dtype=np.float32)
+        _buffers.features = buf
+    
+    # Reset one-hot slots written by the previous request
+    buf[0, _ONEHOT_IDX] = 0
+    
+    # Scale in float64 like StandardScaler, then store at float32
+    src_idx, out_idx, means, scales = _NUM_COLS
+    buf[0, out_idx] = (product_data.as_array(np.float64)[src_idx] - means) / scales
+    
+    for col, mapping in _CAT_MAPS.items():
+        value = getattr(product_data, col)
+        if value not in mapping:
+            if col in _STRICT_CAT_COLS:
+                raise ValueError(f"Found unknown category '{value}' in column '{col}'")
+            continue
+        idx = mapping[value]
+        if idx is not None:
+            buf[0, idx] = 1
+    
+    for col, (idx, codes) in _CODE_COLS.items():
+        value = getattr(product_data, col)
+        if value not in codes:
+            raise ValueError(f"Found unknown category '{value}' in column '{col}'")
+        buf[0, idx] = codes[value]
+    
+    return buf
+
 def preprocess_data(product_data: ProductData) -> np.ndarray:
     """Preprocess product data for model prediction"""
     try:
+        if preprocessor is not None and _NUM_COLS is not None:
+            return _fast_preprocess(product_data)
+        
         # Create DataFrame with single row
         data = pd.DataFrame([{
             'current_price': product_data.current_price,
@@ -114,13 +439,13 @@ def preprocess_data(product_data: ProductData) -> np.ndarray:
             'stock_level': product_data.stock_level,
             'demand_score': product_data.demand_score,
             'historical_sales': product_data.historical_sales,
-            'category': product_data.category.lower(),
-            'day_of_week': product_data.day_of_week.lower()
+            'category': product_data.category,
+            'day_of_week': product_data.day_of_week
         }])
         
         # Apply preprocessing pipeline
         if preprocessor is not None:
-            processed_data = preprocessor.transform(data)
+            processed_data = _apply_preprocessor(data)
         else:
             # Manual preprocessing if no preprocessor available
             processed_data = manual_preprocessing(data)
@@ -131,129 +456,182 @@ def preprocess_data(product_data: ProductData) -> np.ndarray:
         logger.error(f"Error preprocessing data: {e}")
         raise HTTPException(status_code=400, detail=f"Data preprocessing error: {e}")
 
+def _batch_preprocess(products: List[ProductData]) -> pd.DataFrame:
+    """Build a single feature DataFrame for a batch of products"""
+    return pd.DataFrame({
+        'current_price': [p.current_price for p in products],
+        'days_to_expiry': [p.days_to_expiry for p in products],
+        'stock_level': [p.stock_level for p in products],
+        'demand_score': [p.demand_score for p in products],
+        'historical_sales': [p.historical_sales for p in products],
+        'category': [p.category for p in products],
+        'day_of_week': [p.day_of_week for p in products]
+    })
+
+# Pricing factor predicates over (days_to_expiry, stock_level, demand_score, historical_sales).
+# Ranges are written out explicitly so each predicate is independent and works on
+# both scalars and NumPy arrays.
+_FACTOR_PREDICATES = [
+    # Expiry factors
+    ("expired_clearance", lambda d, s, dm, h: d <= 0),
+    ("critical_expiry", lambda d, s, dm, h: (d > 0) & (d <= 1)),
+    ("expiry_proximity", lambda d, s, dm, h: (d > 1) & (d <= 3)),
+    ("short_shelf_life", lambda d, s, dm, h: (d > 3) & (d <= 7)),
+    # Stock level factors
+    ("excess_inventory", lambda d, s, dm, h: s > 200),
+    ("high_stock", lambda d, s, dm, h: (s > 100) & (s <= 200)),
+    ("low_stock", lambda d, s, dm, h: s < 20),
+    # Demand factors
+    ("low_demand", lambda d, s, dm, h: dm < 0.2),
+    ("high_demand", lambda d, s, dm, h: dm > 0.8),
+    # Sales velocity factors
+    ("slow_moving", lambda d, s, dm, h: h < 10),
+    ("fast_moving", lambda d, s, dm, h: h > 100),
+    # Combined factors
+    ("urgent_clearance_needed", lambda d, s, dm, h: (d <= 3) & (s > 100)),
+    ("scarcity_premium", lambda d, s, dm, h: (s < 20) & (dm > 0.7))
+]
+_FACTOR_LABELS = [label for label, _ in _FACTOR_PREDICATES]
+_FACTOR_BITS = np.array([1 << i for i in range(len(_FACTOR_PREDICATES))], dtype=np.int64)
+
+def _derive_bitmask(product_data: ProductData) -> int:
+    """Evaluate every factor predicate once, packing the results into an int (bit i = predicate i)"""
+    args = (product_data.days_to_expiry, product_data.stock_level,
+            product_data.demand_score, product_data.historical_sales)
+    bitmask = 0
+    for i, (_, predicate) in enumerate(_FACTOR_PREDICATES):
+        if predicate(*args):
+            bitmask |= 1 << i
+    return bitmask
+
+@lru_cache(maxsize=None)
+def _factors_from_bitmask(bitmask: int) -> Tuple[str, ...]:
+    """Factor labels for the set bits of a bitmask, in predicate order"""
+    return tuple(compress(_FACTOR_LABELS, ((bitmask >> i) & 1 for i in range(len(_FACTOR_LABELS)))))
+
+def _derive_factors(product_data: ProductData) -> List[str]:
+    """Determine factors affecting pricing for a single product"""
+    return list(_factors_from_bitmask(_derive_bitmask(product_data)))
+
+def _frame_products(data: pd.DataFrame) -> List[ProductData]:
+    """Rebuild validated product models from a feature DataFrame"""
+    return [ProductData.model_construct(**row) for row in data.to_dict('records')]
+
+def _batch_factors(days: np.ndarray, stock: np.ndarray,
+                   demand: np.ndarray, sales: np.ndarray) -> List[List[str]]:
+    """Derive pricing factor labels for a batch from an (N, K) boolean matrix"""
+    matrix = np.column_stack([
+        np.broadcast_to(predicate(days, stock, demand, sales), days.shape)
+        for _, predicate in _FACTOR_PREDICATES
+    ])
+    
+    # Pack each row into the same bitmask used for single predictions
+    bitmasks = matrix.astype(np.int64) @ _FACTOR_BITS
+    return [list(_factors_from_bitmask(bitmask)) for bitmask in bitmasks.tolist()]
+
 def manual_preprocessing(data: pd.DataFrame) -> np.ndarray:
     """Manual preprocessing when preprocessor is not available"""
-    # Categories and days
-    categories = ['bakery', 'dairy', 'fruits', 'meat', 'other', 'seafood', 'vegetables']
-    days = ['friday', 'monday', 'saturday', 'sunday', 'thursday', 'tuesday', 'wednesday']
-    
-    # Initialize result array
-    result = []
-    
-    for _, row in data.iterrows():
-        features = [
-            row['current_price'],
-            row['days_to_expiry'],
-            row['stock_level'],
-            row['demand_score'],
-            row['historical_sales']
-        ]
-        
-        # One-hot encode category
-        for cat in categories:
-            features.append(1 if row['category'] == cat else 0)
-        
-        # One-hot encode day of week
-        for day in days:
-            features.append(1 if row['day_of_week'] == day else 0)
-        
-        result.append(features)
-    
-    return np.array(result)
+    features, _ = _fused_encode(data)
+    return features
 
-def calculate_rule_based_price(product_data: ProductData) -> float:
-    """Calculate price using enhanced rule-based approach with intelligent price optimization"""
-    base_price = product_data.current_price
+# Category-specific adjustments used by rule-based pricing
+_CATEGORY_ADJUSTMENTS = {
+    'meat': 1.05,      # Premium category
+    'seafood': 1.08,   # High-value category
+    'dairy': 1.02,     # Stable demand
+    'fruits': 0.98,    # Price-sensitive
+    'vegetables': 0.96, # Highly price-sensitive
+    'bakery': 0.95,    # Discount-driven
+    'other': 1.0       # Neutral
+}
+# Multipliers indexed by the shared category codes in _CAT_IDX
+_RULE_CAT_MULTIPLIERS = np.array([_CATEGORY_ADJUSTMENTS[cat] for cat in _CATEGORIES], dtype=np.float64)
+
+@njit(cache=True)
+def _rule_price_kernel(current_price, days_to_expiry, stock_level, demand_score,
+                       historical_sales, cat_code, cat_multipliers):
+    """Compiled rule-based pricing kernel operating on scalar inputs"""
+    base_price = current_price
     price_multiplier = 1.0
     
     # 1. EXPIRY-BASED PRICING (Primary factor)
-    if product_data.days_to_expiry <= 0:
+    if days_to_expiry <= 0:
         price_multiplier *= 0.05  # 95% discount for expired items
-    elif product_data.days_to_expiry <= 1:
+    elif days_to_expiry <= 1:
         price_multiplier *= 0.25  # 75% discount - urgent clearance
-    elif product_data.days_to_expiry <= 2:
+    elif days_to_expiry <= 2:
         price_multiplier *= 0.45  # 55% discount - significant markdown
-    elif product_data.days_to_expiry <= 3:
+    elif days_to_expiry <= 3:
         price_multiplier *= 0.60  # 40% discount - moderate markdown
-    elif product_data.days_to_expiry <= 5:
+    elif days_to_expiry <= 5:
         price_multiplier *= 0.75  # 25% discount - encouraging sales
-    elif product_data.days_to_expiry <= 7:
+    elif days_to_expiry <= 7:
         price_multiplier *= 0.85  # 15% discount - slight urgency
-    elif product_data.days_to_expiry <= 14:
+    elif days_to_expiry <= 14:
         price_multiplier *= 0.95  # 5% discount - fresh but moving
-    elif product_data.days_to_expiry <= 21:
+    elif days_to_expiry <= 21:
         price_multiplier *= 1.0   # No expiry adjustment
     else:
         # Very fresh items (>21 days) can command premium
         price_multiplier *= 1.05  # 5% premium for very fresh items
     
     # 2. DEMAND-BASED PRICING (Key revenue driver)
-    if product_data.demand_score < 0.1:
+    if demand_score < 0.1:
         price_multiplier *= 0.75  # 25% discount for very low demand
-    elif product_data.demand_score < 0.3:
+    elif demand_score < 0.3:
         price_multiplier *= 0.85  # 15% discount for low demand
-    elif product_data.demand_score < 0.5:
+    elif demand_score < 0.5:
         price_multiplier *= 0.95  # 5% discount for below average demand
-    elif product_data.demand_score < 0.7:
+    elif demand_score < 0.7:
         price_multiplier *= 1.0   # No adjustment for normal demand
-    elif product_data.demand_score < 0.8:
+    elif demand_score < 0.8:
         price_multiplier *= 1.08  # 8% premium for good demand
-    elif product_data.demand_score < 0.9:
+    elif demand_score < 0.9:
         price_multiplier *= 1.15  # 15% premium for high demand
     else:
         price_multiplier *= 1.25  # 25% premium for very high demand
     
     # 3. STOCK LEVEL OPTIMIZATION (Inventory management)
-    if product_data.stock_level > 300:
+    if stock_level > 300:
         price_multiplier *= 0.80  # 20% discount for excess inventory
-    elif product_data.stock_level > 200:
+    elif stock_level > 200:
         price_multiplier *= 0.90  # 10% discount for high inventory
-    elif product_data.stock_level > 100:
+    elif stock_level > 100:
         price_multiplier *= 0.96  # 4% discount for above normal stock
-    elif product_data.stock_level > 50:
+    elif stock_level > 50:
         price_multiplier *= 1.0   # No adjustment for normal stock
-    elif product_data.stock_level > 20:
+    elif stock_level > 20:
         price_multiplier *= 1.08  # 8% premium for moderate stock
-    elif product_data.stock_level > 10:
+    elif stock_level > 10:
         price_multiplier *= 1.15  # 15% premium for low stock
     else:
         price_multiplier *= 1.30  # 30% premium for very low stock (scarcity pricing)
     
     # 4. SALES VELOCITY OPTIMIZATION
-    if product_data.historical_sales < 5:
+    if historical_sales < 5:
         price_multiplier *= 0.85  # 15% discount for very slow movers
-    elif product_data.historical_sales < 20:
+    elif historical_sales < 20:
         price_multiplier *= 0.92  # 8% discount for slow movers
-    elif product_data.historical_sales > 50:
+    elif historical_sales > 50:
         price_multiplier *= 1.05  # 5% premium for good sellers
-    elif product_data.historical_sales > 100:
+    elif historical_sales > 100:
         price_multiplier *= 1.10  # 10% premium for fast movers
-    elif product_data.historical_sales > 200:
+    elif historical_sales > 200:
         price_multiplier *= 1.15  # 15% premium for top performers
     
-    # 5. CATEGORY-SPECIFIC ADJUSTMENTS
-    category_adjustments = {
-        'meat': 1.05,      # Premium category
-        'seafood': 1.08,   # High-value category
-        'dairy': 1.02,     # Stable demand
-        'fruits': 0.98,    # Price-sensitive
-        'vegetables': 0.96, # Highly price-sensitive
-        'bakery': 0.95,    # Discount-driven
-        'other': 1.0       # Neutral
-    }
-    
-    category_multiplier = category_adjustments.get(product_data.category.lower(), 1.0)
-    price_multiplier *= category_multiplier
+    # 5. CATEGORY-SPECIFIC ADJUSTMENTS (unknown categories are neutral)
+    if cat_code >= 0:
+        price_multiplier *= cat_multipliers[cat_code]
     
     # 6. INTELLIGENT PRICE BOUNDS
     # Only apply aggressive discounts if absolutely necessary (expired + excess stock)
-    if product_data.days_to_expiry > 0 and product_data.demand_score > 0.5:
+    if days_to_expiry > 0 and demand_score > 0.5:
         # For fresh products with decent demand, don't go below 70% of original
         min_multiplier = 0.70
         price_multiplier = max(price_multiplier, min_multiplier)
     
     # Cap maximum premium at 50% unless it's a true scarcity situation
-    if product_data.stock_level > 5:  # Not truly scarce
+    if stock_level > 5:  # Not truly scarce
         max_multiplier = 1.35
         price_multiplier = min(price_multiplier, max_multiplier)
     
@@ -261,10 +639,423 @@ def calculate_rule_based_price(product_data: ProductData) -> float:
     final_price = base_price * price_multiplier
     
     # Ensure minimum viable price (5% of original to cover basic costs)
-    min_price = product_data.current_price * 0.05
+    min_price = current_price * 0.05
     
     return max(final_price, min_price)
 
+@njit(cache=True)
+def _fused_kernel(prices, days, stocks, demands, sales, cat_codes, day_codes,
+                  cat_multipliers, features, rule_prices):
+    """Write manual-layout features and rule-based prices for every row in one pass"""
+    n_numeric = 5
+    day_offset = n_numeric + cat_multipliers.shape[0]
+    for i in range(prices.shape[0]):
+        features[i, 0] = prices[i]
+        features[i, 1] = days[i]
+        features[i, 2] = stocks[i]
+        features[i, 3] = demands[i]
+        features[i, 4] = sales[i]
+        
+        # One-hot encode category and day of week (unknown values stay all-zero)
+        if cat_codes[i] >= 0:
+            features[i, n_numeric + cat_codes[i]] = 1.0
+        if day_codes[i] >= 0:
+            features[i, day_offset + day_codes[i]] = 1.0
+        
+        rule_prices[i] = _rule_price_kernel(prices[i], days[i], stocks[i], demands[i],
+                                            sales[i], cat_codes[i], cat_multipliers)
+
+def _fused_encode(data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode a feature DataFrame and price it with the rules, deriving label codes once"""
+    n = len(data)
+    features = np.zeros((n, len(_NUMERIC_FEATURES) + len(_CATEGORIES) + len(_DAYS)), dtype=np.float32)
+    rule_prices = np.empty(n, dtype=np.float64)
+    
+    _fused_kernel(
+        data['current_price'].to_numpy(dtype=np.float64),
+        data['days_to_expiry'].to_numpy(dtype=np.int64),
+        data['stock_level'].to_numpy(dtype=np.int64),
+        data['demand_score'].to_numpy(dtype=np.float64),
+        data['historical_sales'].to_numpy(dtype=np.float64),
+        data['category'].map(_CAT_IDX).fillna(-1).to_numpy(dtype=np.int64),
+        data['day_of_week'].map(_DAY_IDX).fillna(-1).to_numpy(dtype=np.int64),
+        _RULE_CAT_MULTIPLIERS,
+        features,
+        rule_prices
+    )
+    
+    return features, rule_prices
+
+def _cache_key(product_data: ProductData) -> Tuple:
+    """Build a hashable prediction cache key from the exact validated inputs"""
+    # The key is also what gets priced, so values are never rounded: rounding
+    # would move inputs across the demand and sales thresholds
+    return (
+        product_data.current_price,
+        product_data.days_to_expiry,
+        product_data.stock_level,
+        product_data.demand_score,
+        product_data.historical_sales,
+        product_data.category,
+        product_data.day_of_week
+    )
+
+@lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def _rule_price_cached(current_price: float, days_to_expiry: int, stock_level: int,
+                       demand_score: float, historical_sales: float, category: str) -> float:
+    """Cached rule-based price for a product key (the rules ignore the day of week)"""
+    return float(_rule_price_kernel(
+        float(current_price),
+        int(days_to_expiry),
+        int(stock_level),
+        float(demand_score),
+        float(historical_sales),
+        _CAT_IDX.get(category, -1),
+        _RULE_CAT_MULTIPLIERS
+    ))
+
+@lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def _ml_price_cached(current_price: float, days_to_expiry: int, stock_level: int,
+                     demand_score: float, historical_sales: float,
+                     category: str, day_of_week: str) -> float:
+    """Cached raw model prediction for a product key"""
+    product_data = ProductData.model_construct(
+        current_price=current_price,
+        days_to_expiry=days_to_expiry,
+        stock_level=stock_level,
+        demand_score=demand_score,
+        historical_sales=historical_sales,
+        category=category,
+        day_of_week=day_of_week
+    )
+    processed_data = preprocess_data(product_data)
+    return float(_model_predict(processed_data)[0])
+
+def clear_prediction_caches():
+    """Drop cached predictions, e.g. after the model is reloaded"""
+    _rule_price_cached.cache_clear()
+    _ml_price_cached.cache_clear()
+
+def calculate_rule_based_price(product_data: ProductData) -> float:
+    """Calculate price using enhanced rule-based approach with intelligent price optimization"""
+    return _rule_price_cached(
+        product_data.current_price,
+        product_data.days_to_expiry,
+        product_data.stock_level,
+        product_data.demand_score,
+        product_data.historical_sales,
+        product_data.category
+    )
+
+def _now_iso() -> str:
+    """Current ISO timestamp, reusing the periodically refreshed value when available"""
+    return _NOW_ISO or datetime.now().isoformat()
+
+async def _refresh_timestamp():
+    """Keep _NOW_ISO current so responses reuse a preformatted timestamp"""
+    global _NOW_ISO
+    while True:
+        _NOW_ISO = datetime.now().isoformat()
+        await asyncio.sleep(TIMESTAMP_REFRESH_SECONDS)
+
+def _compute_rule(product_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Rule-based pricing for a validated product dict (runs in a worker process)"""
+    product_data = ProductData.model_construct(**product_dict)
+    return {
+        "recommended_price": round(calculate_rule_based_price(product_data), 2),
+        "confidence": 0.6,
+        "factors": ["rule_based_fallback"],
+        "method": "rule_based"
+    }
+
+def _compute_ml(product_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Model-based pricing for a validated product dict (runs in a worker process)"""
+    return _ml_result(ProductData.model_construct(**product_dict))
+
+def _ml_result(product_data: ProductData) -> Dict[str, Any]:
+    """Model-based pricing fields for a single product"""
+    # Preprocess data and make prediction (cached per input)
+    prediction = _ml_price_cached(*_cache_key(product_data))
+    
+    # Ensure minimum price (10% of current price)
+    min_price = product_data.current_price * 0.1
+    recommended_price = max(prediction, min_price)
+    
+    # Calculate confidence based on model (simplified)
+    confidence = min(0.95, max(0.6, 1.0 - abs(prediction - product_data.current_price) / product_data.current_price))
+    
+    return {
+        "recommended_price": round(recommended_price, 2),
+        "confidence": round(confidence, 3),
+        "factors": _derive_factors(product_data),
+        "method": "ml_model"
+    }
+
+def _init_worker():
+    """Load the model into a freshly spawned worker process"""
+    if model is None and not load_model():
+        logger.error("Worker failed to load model")
+
+def _start_pool() -> ProcessPoolExecutor:
+    """Create the worker pool"""
+    # Spawn (rather than fork) workers so they never inherit OpenMP state from training
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker
+    )
+
+def _restart_pool(broken_pool: ProcessPoolExecutor):
+    """Replace a broken worker pool, unless a concurrent caller already did"""
+    global _POOL, _POOL_RESTARTS
+    if _POOL is not broken_pool:
+        return
+    logger.error("Worker pool is broken; starting a new one")
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+    _POOL = _start_pool()
+    _POOL_RESTARTS += 1
+
+async def _run_cpu_bound(fn, *args):
+    """Run CPU-bound work in the worker pool, or inline when no pool is running"""
+    pool = _POOL
+    if pool is None:
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A worker died; recover the pool and retry once on the fresh workers
+        _restart_pool(pool)
+        if _POOL is None:
+            raise
+        return await loop.run_in_executor(_POOL, fn, *args)
+
+async def _pool_status() -> str:
+    """Probe the worker pool: 'inline', 'ok', 'busy' or 'unavailable'"""
+    if _POOL is None:
+        return "inline"
+    try:
+        await asyncio.wait_for(_run_cpu_bound(os.getpid), POOL_PROBE_TIMEOUT_SECONDS)
+        return "ok"
+    except asyncio.TimeoutError:
+        # Workers are alive but occupied with queued predictions
+        return "busy"
+    except Exception as e:
+        logger.error(f"Worker pool probe failed: {e}")
+        return "unavailable"
+
+class Batcher:
+    """Coalesce concurrent single-product predictions into batched model calls"""
+    
+    def __init__(self, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.task = None
+        self.inflight = set()
+    
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+    
+    def start(self):
+        """Start collecting requests on the running event loop"""
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._collect())
+    
+    async def stop(self):
+        """Stop collecting and cancel any batches still in flight"""
+        if self.task is None:
+            return
+        self.task.cancel()
+        for task in list(self.inflight):
+            task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self.task
+        self.task = None
+    
+    async def submit(self, product_data: ProductData) -> PredictionResponse:
+        """Queue a product and wait for its prediction"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((product_data, future))
+        return await future
+    
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            # An idle service dispatches immediately; waiting only pays off under load
+            idle = self.queue.empty() and not self.inflight
+            
+            # Gather more requests until the batch is full or the wait budget is spent
+            while not idle and len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Run batches concurrently so multiple pool workers stay busy
+            task = asyncio.create_task(self._dispatch(items))
+            self.inflight.add(task)
+            task.add_done_callback(self.inflight.discard)
+    
+    async def _dispatch(self, items):
+        products = [product_data for product_data, _ in items]
+        try:
+            # Stamp with the event loop's refreshed timestamp; spawned workers never run the refresher
+            predictions = await _run_cpu_bound(_predict_batch, products, _now_iso())
+        except Exception as e:
+            if len(items) == 1:
+                _, future = items[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # Re-run each product on its own so one bad request cannot fail its neighbours
+            logger.warning(f"Batch prediction failed, retrying items individually: {e}")
+            await asyncio.gather(*(self._dispatch([item]) for item in items))
+        else:
+            for (_, future), prediction in zip(items, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+_batcher = Batcher()
+
+def _predict_batch(products: List[ProductData], timestamp: str) -> List[PredictionResponse]:
+    """Run a single vectorized model prediction over a batch of products"""
+    if preprocessor is None or _NUM_COLS is None:
+        return _predict_frame(_batch_preprocess(products), timestamp)
+    
+    known = [_product_known(product_data) for product_data in products]
+    if all(known):
+        if len(products) == 1:
+            # A lone request takes the cached single-product path
+            return [PredictionResponse(**_ml_result(products[0]), timestamp=timestamp)]
+        return _predict_products(products, timestamp)
+    
+    # Price products with unknown labels by rules so they don't fail the rest of the batch
+    logger.warning(f"Pricing {known.count(False)} products with unknown labels by rules")
+    known_products = [product_data for product_data, ok in zip(products, known) if ok]
+    model_predictions = iter(_predict_products(known_products, timestamp) if known_products else [])
+    return [
+        next(model_predictions) if ok else _batch_fallback(product_data, 0.5, "error_fallback", timestamp)
+        for product_data, ok in zip(products, known)
+    ]
+
+def _product_known(product_data: ProductData) -> bool:
+    """Whether the encoding plan can encode a product's categorical labels"""
+    return (all(getattr(product_data, col) in _CAT_MAPS[col] for col in _STRICT_CAT_COLS)
+            and all(getattr(product_data, col) in codes for col, (_, codes) in _CODE_COLS.items()))
+
+def _encode_products(products: List[ProductData], numeric: np.ndarray) -> np.ndarray:
+    """Encode known products into an (N, F) float32 matrix with the encoding plan"""
+    features = np.zeros((len(products), _N_FEATURES), dtype=np.float32)
+    
+    # Scale in float64 like StandardScaler, then store at float32
+    src_idx, out_idx, means, scales = _NUM_COLS
+    features[:, out_idx] = (numeric[:, src_idx] - means) / scales
+    
+    for col, mapping in _CAT_MAPS.items():
+        for row, product_data in enumerate(products):
+            # Dropped and ignored unknown labels encode as all zeros
+            idx = mapping.get(getattr(product_data, col))
+            if idx is not None:
+                features[row, idx] = 1
+    
+    for col, (idx, codes) in _CODE_COLS.items():
+        features[:, idx] = [codes[getattr(product_data, col)] for product_data in products]
+    
+    return features
+
+def _predict_products(products: List[ProductData], timestamp: str) -> List[PredictionResponse]:
+    """Vectorized model prediction for products the encoding plan can encode"""
+    # Numeric columns in _NUMERIC_FEATURES order, one row per product
+    numeric = np.array([
+        (p.current_price, p.days_to_expiry, p.stock_level, p.demand_score, p.historical_sales)
+        for p in products
+    ], dtype=np.float64)
+    
+    predictions = np.asarray(_model_predict(_encode_products(products, numeric)), dtype=np.float64)
+    return _ml_responses(predictions, *numeric.T, timestamp)
+
+def _known_rows(data: pd.DataFrame) -> np.ndarray:
+    """Mask of rows whose categorical labels the loaded preprocessor can encode"""
+    known = np.ones(len(data), dtype=bool)
+    if preprocessor is None or _NUM_COLS is None:
+        # Manual encoding leaves unknown labels all-zero; other preprocessors raise per batch
+        return known
+    for col in _STRICT_CAT_COLS:
+        known &= data[col].isin(_CAT_MAPS[col].keys()).to_numpy()
+    for col, (_, codes) in _CODE_COLS.items():
+        known &= data[col].isin(codes.keys()).to_numpy()
+    return known
+
+def _predict_frame(data: pd.DataFrame, timestamp: str) -> List[PredictionResponse]:
+    """Run a single vectorized model prediction over a feature DataFrame"""
+    known = _known_rows(data)
+    if known.all():
+        return _predict_known(data, timestamp)
+    
+    # Price rows with unknown labels by rules so they don't fail the rest of the batch
+    known_idx, unknown_idx = np.flatnonzero(known), np.flatnonzero(~known)
+    logger.warning(f"Pricing {len(unknown_idx)} products with unknown labels by rules")
+    
+    predictions = [None] * len(data)
+    if len(known_idx):
+        for i, prediction in zip(known_idx.tolist(), _predict_known(data.iloc[known_idx], timestamp)):
+            predictions[i] = prediction
+    for i, prediction in zip(unknown_idx.tolist(),
+                             _batch_fallbacks(data.iloc[unknown_idx], 0.5, "error_fallback", timestamp)):
+        predictions[i] = prediction
+    return predictions
+
+def _predict_known(data: pd.DataFrame, timestamp: str) -> List[PredictionResponse]:
+    """Vectorized model prediction for rows the preprocessor can encode"""
+    # Apply preprocessing pipeline once for the whole batch
+    if preprocessor is not None:
+        processed_data = _apply_preprocessor(data)
+    else:
+        processed_data = manual_preprocessing(data)
+    
+    predictions = np.asarray(_model_predict(processed_data), dtype=np.float64)
+    
+    return _ml_responses(
+        predictions,
+        data['current_price'].to_numpy(dtype=np.float64),
+        data['days_to_expiry'].to_numpy(),
+        data['stock_level'].to_numpy(),
+        data['demand_score'].to_numpy(),
+        data['historical_sales'].to_numpy(),
+        timestamp
+    )
+
+def _ml_responses(predictions: np.ndarray, current_prices: np.ndarray, days: np.ndarray,
+                  stock: np.ndarray, demand: np.ndarray, sales: np.ndarray,
+                  timestamp: str) -> List[PredictionResponse]:
+    """Build model responses from raw predictions and the products' numeric inputs"""
+    # Ensure minimum price (10% of current price)
+    min_prices = current_prices * 0.1
+    recommended = np.maximum(predictions, min_prices)
+    
+    # Calculate confidence based on model (simplified)
+    confidence = np.clip(1.0 - np.abs(predictions - current_prices) / current_prices, 0.6, 0.95)
+    
+    factors = _batch_factors(days, stock, demand, sales)
+    return [
+        PredictionResponse(
+            recommended_price=round(price, 2),
+            confidence=round(conf, 3),
+            factors=item_factors,
+            method="ml_model",
+            timestamp=timestamp
+        )
+        for price, conf, item_factors in zip(recommended.tolist(), confidence.tolist(), factors)
+    ]
+
 def train_model():
     """Train a new model with synthetic data"""
     logger.info("Training new model with synthetic data...")
@@ -280,15 +1071,18 @@ def train_model():
         
         # Save model and preprocessor
         os.makedirs("models", exist_ok=True)
-        joblib.dump(trained_model, "models/xgboost_pricing_model.joblib")
-        joblib.dump(trained_preprocessor, "models/preprocessor.joblib")
+        joblib.dump(trained_model, "models/xgboost_pricing_model.joblib", compress=('lz4', 3))
+        joblib.dump(trained_preprocessor, "models/preprocessor.joblib", compress=('lz4', 3))
         joblib.dump(features, "models/feature_names.joblib")
+        # Keep only the rounds early stopping selected; Booster consumers predict with every stored tree
+        trained_model.get_booster()[: trained_model.best_iteration + 1].save_model("models/xgboost_pricing_model.ubj")
         
         # Update global variables
         global model, preprocessor, feature_names
         model = trained_model
         preprocessor = trained_preprocessor
         feature_names = features
+        _prepare_inference()
         
         logger.info("Model training completed successfully")
         
@@ -303,15 +1097,42 @@ async def startup_event():
     if not load_model():
         logger.error("Failed to load model")
         raise RuntimeError("Model loading failed")
+    
+    # Compile the rule-based pricing kernels before serving the first request
+    _rule_price_kernel(1.0, 1, 1, 0.5, 1.0, 0, _RULE_CAT_MULTIPLIERS)
+    _fused_encode(_batch_preprocess([ProductData(current_price=1.0, days_to_expiry=1, stock_level=1,
+                                                 demand_score=0.5, category='other')]))
+    
+    global _POOL
+    _POOL = _start_pool()
+    _batcher.start()
+    
+    global _timestamp_task
+    _timestamp_task = asyncio.create_task(_refresh_timestamp())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the timestamp refresher, prediction batcher and worker pool"""
+    global _POOL, _NOW_ISO, _timestamp_task
+    if _timestamp_task is not None:
+        _timestamp_task.cancel()
+        _timestamp_task = None
+        _NOW_ISO = ''
+    await _batcher.stop()
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    pool_status = await _pool_status()
     return {
-        "status": "healthy",
+        "status": "degraded" if pool_status == "unavailable" else "healthy",
         "model_loaded": model is not None,
         "preprocessor_loaded": preprocessor is not None,
-        "timestamp": datetime.now().isoformat()
+        "worker_pool": {"status": pool_status, "restarts": _POOL_RESTARTS},
+        "timestamp": _now_iso()
     }
 
 @app.post("/predict-price", response_model=PredictionResponse)
@@ -320,78 +1141,14 @@ async def predict_price(product_data: ProductData):
     try:
         if model is None:
             # Use rule-based pricing as fallback
-            recommended_price = calculate_rule_based_price(product_data)
-            return PredictionResponse(
-                recommended_price=round(recommended_price, 2),
-                confidence=0.6,
-                factors=["rule_based_fallback"],
-                method="rule_based",
-                timestamp=datetime.now().isoformat()
-            )
-        
-        # Preprocess data
-        processed_data = preprocess_data(product_data)
-        
-        # Make prediction
-        prediction = model.predict(processed_data)[0]
-        
-        # Ensure minimum price (10% of current price)
-        min_price = product_data.current_price * 0.1
-        recommended_price = max(prediction, min_price)
-        
-        # Calculate confidence based on model (simplified)
-        confidence = min(0.95, max(0.6, 1.0 - abs(prediction - product_data.current_price) / product_data.current_price))
-        
-        # Determine factors affecting pricing
-        factors = []
-        
-        # Expiry factors
-        if product_data.days_to_expiry <= 0:
-            factors.append("expired_clearance")
-        elif product_data.days_to_expiry <= 1:
-            factors.append("critical_expiry")
-        elif product_data.days_to_expiry <= 3:
-            factors.append("expiry_proximity")
-        elif product_data.days_to_expiry <= 7:
-            factors.append("short_shelf_life")
-        
-        # Stock level factors
-        if product_data.stock_level > 200:
-            factors.append("excess_inventory")
-        elif product_data.stock_level > 100:
-            factors.append("high_stock")
-        elif product_data.stock_level < 20:
-            factors.append("low_stock")
-        elif product_data.stock_level < 10:
-            factors.append("critical_stock")
-        
-        # Demand factors
-        if product_data.demand_score < 0.2:
-            factors.append("low_demand")
-        elif product_data.demand_score > 0.8:
-            factors.append("high_demand")
-        elif product_data.demand_score > 0.9:
-            factors.append("peak_demand")
-        
-        # Sales velocity factors
-        if product_data.historical_sales < 10:
-            factors.append("slow_moving")
-        elif product_data.historical_sales > 100:
-            factors.append("fast_moving")
+            result = await _run_cpu_bound(_compute_rule, product_data.model_dump())
+        elif _batcher.running:
+            # Coalesce with other in-flight requests into one model call
+            return await _batcher.submit(product_data)
+        else:
+            result = await _run_cpu_bound(_compute_ml, product_data.model_dump())
         
-        # Combined factors
-        if product_data.days_to_expiry <= 3 and product_data.stock_level > 100:
-            factors.append("urgent_clearance_needed")
-        if product_data.stock_level < 20 and product_data.demand_score > 0.7:
-            factors.append("scarcity_premium")
-        
-        return PredictionResponse(
-            recommended_price=round(recommended_price, 2),
-            confidence=round(confidence, 3),
-            factors=factors,
-            method="ml_model",
-            timestamp=datetime.now().isoformat()
-        )
+        return PredictionResponse(**result, timestamp=_now_iso())
         
     except Exception as e:
         logger.error(f"Error in price prediction: {e}")
@@ -402,42 +1159,106 @@ async def predict_price(product_data: ProductData):
             confidence=0.5,
             factors=["error_fallback"],
             method="rule_based_fallback",
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
 
+def _batch_fallback(product_data: ProductData, confidence: float = 0.4,
+                    factor: str = "batch_error_fallback",
+                    timestamp: Optional[str] = None) -> PredictionResponse:
+    """Rule-based prediction used when a batch item cannot be priced"""
+    return PredictionResponse(
+        recommended_price=round(calculate_rule_based_price(product_data), 2),
+        confidence=confidence,
+        factors=[factor],
+        method="rule_based_fallback",
+        timestamp=timestamp or _now_iso()
+    )
+
+async def _predict_each(products: List[ProductData]) -> List[PredictionResponse]:
+    """Predict products individually, dispatching all of them at once"""
+    # Dispatch all items at once so the worker pool can run them in parallel
+    results = await asyncio.gather(
+        *(predict_price(product_data) for product_data in products),
+        return_exceptions=True
+    )
+    return [
+        _batch_fallback(product_data) if isinstance(result, Exception) else result
+        for product_data, result in zip(products, results)
+    ]
+
+def _batch_fallbacks(data: pd.DataFrame, confidence: float = 0.4,
+                     factor: str = "batch_error_fallback",
+                     timestamp: Optional[str] = None) -> List[PredictionResponse]:
+    """Rule-based predictions for batch rows that could not be priced by the model"""
+    _, rule_prices = _fused_encode(data)
+    timestamp = timestamp or _now_iso()
+    return [
+        PredictionResponse(
+            recommended_price=round(price, 2),
+            confidence=confidence,
+            factors=[factor],
+            method="rule_based_fallback",
+            timestamp=timestamp
+        )
+        for price in rule_prices.tolist()
+    ]
+
 @app.post("/batch-predict", response_model=BatchPredictionResponse)
 async def batch_predict(request: BatchPredictRequest):
     """Predict optimal prices for multiple products"""
     try:
-        predictions = []
+        products = request.products
         
-        for product_data in request.products:
+        if not products:
+            predictions = []
+        elif model is None:
+            predictions = await _predict_each(products)
+        else:
             try:
-                # Get individual prediction
-                prediction = await predict_price(product_data)
-                predictions.append(prediction)
+                predictions = await _run_cpu_bound(_predict_batch, products, _now_iso())
             except Exception as e:
-                logger.error(f"Error predicting price for product: {e}")
-                # Add fallback prediction
-                fallback_price = calculate_rule_based_price(product_data)
-                predictions.append(PredictionResponse(
-                    recommended_price=round(fallback_price, 2),
-                    confidence=0.4,
-                    factors=["batch_error_fallback"],
-                    method="rule_based_fallback",
-                    timestamp=datetime.now().isoformat()
-                ))
+                logger.error(f"Error predicting prices for batch: {e}")
+                # Add fallback predictions
+                predictions = _batch_fallbacks(_batch_preprocess(products))
         
         return BatchPredictionResponse(
             predictions=predictions,
             total_processed=len(predictions),
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
         
     except Exception as e:
         logger.error(f"Error in batch prediction: {e}")
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {e}")
 
+@app.post("/batch-predict-columnar", response_model=BatchPredictionResponse)
+async def batch_predict_columnar(request: BatchPredictColumnarRequest):
+    """Predict optimal prices for multiple products given as columns"""
+    try:
+        data = request.to_frame()
+        
+        if data.empty:
+            predictions = []
+        elif model is None:
+            predictions = await _predict_each(_frame_products(data))
+        else:
+            try:
+                predictions = await _run_cpu_bound(_predict_frame, data, _now_iso())
+            except Exception as e:
+                logger.error(f"Error predicting prices for columnar batch: {e}")
+                # Add fallback predictions
+                predictions = _batch_fallbacks(data)
+        
+        return BatchPredictionResponse(
+            predictions=predictions,
+            total_processed=len(predictions),
+            timestamp=_now_iso()
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in columnar batch prediction: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {e}")
+
 @app.get("/model-info")
 async def get_model_info():
     """Get information about the loaded model"""
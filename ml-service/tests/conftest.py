@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the service's top-level packages (training, main) importable from any working directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,75 @@
+"""
+API tests for the prediction endpoints' validation and fallback handling
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from training.train_model import create_synthetic_data, train_xgboost_model
+
+
+PRODUCTS = [
+    {'current_price': 4.5, 'days_to_expiry': 2, 'stock_level': 250, 'demand_score': 0.3,
+     'category': 'dairy', 'historical_sales': 12, 'day_of_week': 'friday'},
+    {'current_price': 12.0, 'days_to_expiry': 9, 'stock_level': 15, 'demand_score': 0.85,
+     'category': 'meat', 'historical_sales': 140, 'day_of_week': 'saturday'},
+    {'current_price': 2.25, 'days_to_expiry': 0, 'stock_level': 60, 'demand_score': 0.5,
+     'category': 'vegetables', 'historical_sales': 3, 'day_of_week': 'monday'},
+]
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    """Serve a small freshly trained model, predicting inline without the worker pool"""
+    saved = (main.model, main.preprocessor, main.feature_names, main.COMPILED_MODEL_DIR)
+    main.COMPILED_MODEL_DIR = tmp_path_factory.mktemp('compiled')
+    main.model, main.preprocessor, main.feature_names = train_xgboost_model(
+        create_synthetic_data(n_samples=600, seed=0)
+    )
+    main._prepare_inference()
+    
+    # No context manager: startup would load the on-disk model and start the pool
+    yield TestClient(main.app)
+    
+    main.model, main.preprocessor, main.feature_names, main.COMPILED_MODEL_DIR = saved
+    main._prepare_inference()
+
+
+def test_unknown_category_falls_back_for_that_row_only(client):
+    products = [PRODUCTS[0], dict(PRODUCTS[1], category='candy'), PRODUCTS[2]]
+    
+    response = client.post('/batch-predict', json={'products': products})
+    
+    assert response.status_code == 200
+    predictions = response.json()['predictions']
+    assert [p['method'] for p in predictions] == ['ml_model', 'rule_based_fallback', 'ml_model']
+    assert predictions[1]['factors'] == ['error_fallback']
+    assert predictions[1]['confidence'] == 0.5
+    
+    # Known rows price exactly as they would in a batch without the bad row
+    clean = client.post('/batch-predict', json={'products': [PRODUCTS[0], PRODUCTS[2]]}).json()
+    for got, want in zip([predictions[0], predictions[2]], clean['predictions']):
+        assert got['recommended_price'] == want['recommended_price']
+
+
+def test_columnar_length_mismatch_is_rejected(client):
+    columns = {key: [p[key] for p in PRODUCTS] for key in PRODUCTS[0]}
+    columns['stock_level'] = columns['stock_level'][:2]
+    
+    response = client.post('/batch-predict-columnar', json=columns)
+    
+    assert response.status_code == 422
+
+
+def test_columnar_defaults_match_row_endpoint(client):
+    required = ('current_price', 'days_to_expiry', 'stock_level', 'demand_score', 'category')
+    columns = {key: [p[key] for p in PRODUCTS] for key in required}
+    
+    response = client.post('/batch-predict-columnar', json=columns)
+    
+    assert response.status_code == 200
+    for product, columnar in zip(PRODUCTS, response.json()['predictions']):
+        row = client.post('/predict-price', json={key: product[key] for key in required}).json()
+        for field in ('recommended_price', 'confidence', 'factors', 'method'):
+            assert columnar[field] == row[field]
@@ -0,0 +1,85 @@
+"""
+Tests for the synthetic target price rules in training.train_model
+"""
+
+import numpy as np
+import pytest
+
+from training.train_model import (
+    _CATEGORY_POSITION,
+    _DAY_POSITION,
+    calculate_target_price,
+    calculate_target_price_vec,
+)
+
+
+class BoundRng:
+    """Stand-in Generator that pins every rule draw to the low or high end of its range"""
+    
+    def __init__(self, upper):
+        self.upper = upper
+    
+    def uniform(self, low, high):
+        return np.array(high if self.upper else low, dtype=float)
+    
+    def random(self, size):
+        return np.full(size, 1.0 if self.upper else 0.0)
+    
+    def normal(self, loc, scale, size=None):
+        return np.ones(size) if size is not None else 1.0
+
+
+def _vec_row(rng, n=1, original_price=10.0, days_to_expiry=10, stock_level=75, demand_score=0.6,
+             category='dairy', historical_sales=10.0, day_of_week='tuesday'):
+    """Price n copies of one product through the vectorized rules"""
+    return calculate_target_price_vec(
+        rng,
+        np.full(n, original_price),
+        np.full(n, days_to_expiry),
+        np.full(n, stock_level),
+        np.full(n, demand_score),
+        np.full(n, _CATEGORY_POSITION[category]),
+        np.full(n, historical_sales),
+        np.full(n, _DAY_POSITION[day_of_week]),
+    )
+
+
+def test_vec_is_reproducible_for_a_fixed_seed():
+    first = _vec_row(np.random.default_rng(7), n=500)
+    second = _vec_row(np.random.default_rng(7), n=500)
+    
+    assert first.shape == (500,)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_vec_matches_scalar_distribution():
+    n = 20000
+    row = dict(original_price=10.0, days_to_expiry=4, stock_level=150, demand_score=0.85,
+               category='bakery', historical_sales=60.0, day_of_week='saturday')
+    
+    vec = _vec_row(np.random.default_rng(0), n=n, **row)
+    rng = np.random.default_rng(1)
+    scalar = np.array([calculate_target_price(rng, *row.values()) for _ in range(n)])
+    
+    assert vec.mean() == pytest.approx(scalar.mean(), rel=0.01)
+    assert vec.std() == pytest.approx(scalar.std(), rel=0.05)
+    np.testing.assert_allclose(np.percentile(vec, [5, 50, 95]),
+                               np.percentile(scalar, [5, 50, 95]), rtol=0.02)
+
+
+def test_slow_sellers_get_a_single_sales_adjustment():
+    # Upper bounds: expiry 1.05, demand 1.05, stock 1.05, slow sales 0.98, dairy 1.0, tuesday 1.0;
+    # the removed duplicate block would have applied another 0.95
+    expected = round(10.0 * 1.05 * 1.05 * 1.05 * 0.98, 2)
+    
+    assert _vec_row(BoundRng(upper=True))[0] == expected
+    assert calculate_target_price(BoundRng(upper=True), 10.0, 10, 75, 0.6,
+                                  'dairy', 10.0, 'tuesday') == expected
+
+
+def test_price_is_clamped_to_five_percent_of_original():
+    row = dict(original_price=100.0, days_to_expiry=0, stock_level=400, demand_score=0.05,
+               category='bakery', historical_sales=1.0, day_of_week='monday')
+    
+    assert _vec_row(BoundRng(upper=False), **row)[0] == 5.0
+    assert calculate_target_price(BoundRng(upper=False), *row.values()) == 5.0
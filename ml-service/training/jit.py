@@ -0,0 +1,12 @@
+"""
+Optional Numba support shared by the service and the training module
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; fall back to running the kernels as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -4,34 +4,118 @@ Training module for XGBoost dynamic pricing model
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import xgboost as xgb
 import joblib
 import logging
+import hashlib
+import os
+import argparse
 from datetime import datetime, timedelta
-import random
+
+try:
+    from .jit import njit
+except ImportError:
+    # Run as a script from the training directory
+    from jit import njit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_synthetic_data(n_samples=10000):
+# Label arrays in generation order; sampled index arrays gather labels with one fancy index
+CATEGORIES = np.array(['dairy', 'meat', 'vegetables', 'fruits', 'bakery', 'seafood', 'other'])
+DAYS_OF_WEEK = np.array(['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'])
+
+# Positions in generation order, as indexed by the range tables and scalar rules
+_CATEGORY_POSITION = {cat: i for i, cat in enumerate(CATEGORIES.tolist())}
+_DAY_POSITION = {day: i for i, day in enumerate(DAYS_OF_WEEK.tolist())}
+
+# Feature encoding uses sorted label order, matching the OneHotEncoder layout of earlier models
+CAT_TO_IDX = {cat: i for i, cat in enumerate(sorted(CATEGORIES.tolist()))}
+DOW_TO_IDX = {day: i for i, day in enumerate(sorted(DAYS_OF_WEEK.tolist()))}
+# Drop-first one-hot rows, indexed by label index
+CAT_OH = np.eye(len(CAT_TO_IDX), dtype=np.float32)[:, 1:]
+DOW_OH = np.eye(len(DOW_TO_IDX), dtype=np.float32)[:, 1:]
+
+# Bump whenever the target price rules change so cached datasets are regenerated
+TARGET_RULES_VERSION = 1
+
+# Boosting round cap and early-stopping patience, shared by the final fit and cross-validation
+MAX_BOOST_ROUNDS = 2000
+EARLY_STOPPING_ROUNDS = 20
+
+# Target price rules as (low, high) multiplier ranges per bin, mirroring calculate_target_price
+EXPIRY_BINS = [0, 1, 2, 3, 5, 7, 14, 21]  # days_to_expiry <= edge
+EXPIRY_RANGES = np.array([
+    (0.05, 0.15),  # Expired items - deep discount to clear inventory
+    (0.20, 0.40),  # 1 day to expiry - aggressive discount
+    (0.40, 0.60),  # 2 days to expiry - significant discount
+    (0.55, 0.75),  # 3 days to expiry - moderate discount
+    (0.75, 0.90),  # 5 days to expiry - small discount
+    (0.88, 0.98),  # 1 week to expiry - minimal discount
+    (0.95, 1.05),  # 2 weeks to expiry - neutral to slight variation
+    (0.98, 1.10),  # 3 weeks - fresh, can maintain or increase price
+    (1.00, 1.15)   # Very fresh items (>21 days) - premium pricing opportunity
+])
+
+DEMAND_BINS = [0.1, 0.3, 0.5, 0.7, 0.8, 0.9]  # demand_score < edge
+DEMAND_RANGES = np.array([
+    (0.70, 0.85),  # Very low demand - significant discount needed
+    (0.80, 0.95),  # Low demand - moderate discount
+    (0.90, 1.00),  # Below average demand - small discount
+    (0.95, 1.05),  # Normal demand - maintain or slight increase
+    (1.02, 1.12),  # Good demand - moderate premium
+    (1.08, 1.20),  # High demand - significant premium
+    (1.15, 1.35)   # Very high demand - maximum premium
+])
+
+STOCK_BINS = [10, 20, 50, 100, 200, 300]  # stock_level <= edge
+STOCK_RANGES = np.array([
+    (1.20, 1.50),  # Critical stock - scarcity pricing
+    (1.12, 1.25),  # Very low stock - significant premium
+    (1.05, 1.15),  # Low stock - premium pricing
+    (0.98, 1.05),  # Normal stock - maintain price
+    (0.92, 1.02),  # Above average - small discount
+    (0.85, 0.95),  # High inventory - moderate discount
+    (0.75, 0.90)   # Excess inventory - aggressive pricing to move stock
+])
+
+SALES_VELOCITY_RANGES = np.array([
+    (0.80, 0.92),  # Very slow movers (< 5) - need discount to stimulate sales
+    (0.90, 0.98),  # Slow movers (< 20) - moderate discount
+    (1.00, 1.00),  # Average sellers - no adjustment
+    (1.02, 1.08)   # Good sellers (> 50) - can maintain premium
+])
+
+CATEGORY_RANGES = np.array([
+    (0.95, 1.00),  # dairy
+    (0.98, 1.02),  # meat
+    (0.90, 0.95),  # vegetables
+    (0.90, 0.95),  # fruits
+    (0.85, 0.95),  # bakery
+    (1.00, 1.05),  # seafood
+    (0.95, 1.00)   # other
+])
+
+DAY_OF_WEEK_RANGES = np.array([
+    (0.95, 1.00),  # monday - Monday discount
+    (1.00, 1.00),  # tuesday
+    (1.00, 1.00),  # wednesday
+    (1.00, 1.00),  # thursday
+    (1.00, 1.00),  # friday
+    (1.00, 1.05),  # saturday - Weekend premium
+    (1.00, 1.05)   # sunday - Weekend premium
+])
+
+def create_synthetic_data(n_samples=10000, seed=42):
     """
     Create synthetic training data for dynamic pricing model
     """
     logger.info(f"Creating {n_samples} synthetic data samples...")
     
-    np.random.seed(42)
-    random.seed(42)
-    
-    data = []
-    
-    categories = ['dairy', 'meat', 'vegetables', 'fruits', 'bakery', 'seafood', 'other']
-    days_of_week = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    rng = np.random.default_rng(seed)
     
     # Category-specific base prices
     category_base_prices = {
@@ -44,248 +128,411 @@ def create_synthetic_data(n_samples=10000):
         'other': (1, 30)
     }
     
-    for i in range(n_samples):
-        # Random category
-        category = random.choice(categories)
-        min_price, max_price = category_base_prices[category]
-        
-        # Base product characteristics
-        original_price = np.random.uniform(min_price, max_price)
-        days_to_expiry = np.random.randint(-2, 30)  # Can be negative (expired)
-        stock_level = np.random.randint(0, 500)
-        demand_score = np.random.beta(2, 2)  # Beta distribution for demand score
-        historical_sales = np.random.poisson(50)
-        day_of_week = random.choice(days_of_week)
-        
-        # Calculate target price based on business logic
-        target_price = calculate_target_price(
-            original_price, days_to_expiry, stock_level, 
-            demand_score, category, historical_sales, day_of_week
-        )
-        
-        data.append({
-            'current_price': original_price,
-            'days_to_expiry': days_to_expiry,
-            'stock_level': stock_level,
-            'demand_score': demand_score,
-            'category': category,
-            'historical_sales': historical_sales,
-            'day_of_week': day_of_week,
-            'target_price': target_price
-        })
-    
-    df = pd.DataFrame(data)
+    # Random category, drawn for all samples at once
+    cat_idx = rng.integers(0, len(CATEGORIES), n_samples)
+    base_prices = np.array([category_base_prices[c] for c in CATEGORIES.tolist()], dtype=float)
+    min_price = base_prices[cat_idx, 0]
+    max_price = base_prices[cat_idx, 1]
+    
+    # Base product characteristics
+    original_price = rng.uniform(min_price, max_price)
+    days_to_expiry = rng.integers(-2, 30, n_samples)  # Can be negative (expired)
+    stock_level = rng.integers(0, 500, n_samples)
+    demand_score = rng.beta(2, 2, n_samples)  # Beta distribution for demand score
+    historical_sales = rng.poisson(50, n_samples)
+    dow_idx = rng.integers(0, len(DAYS_OF_WEEK), n_samples)
+    
+    category = CATEGORIES[cat_idx]
+    day_of_week = DAYS_OF_WEEK[dow_idx]
+    
+    # Calculate target price from the index arrays, no label lookups needed
+    target_price = calculate_target_price_vec(
+        rng, original_price, days_to_expiry, stock_level,
+        demand_score, cat_idx, historical_sales, dow_idx
+    )
+    
+    df = pd.DataFrame({
+        'current_price': original_price,
+        'days_to_expiry': days_to_expiry,
+        'stock_level': stock_level,
+        'demand_score': demand_score,
+        'category': category,
+        'historical_sales': historical_sales,
+        'day_of_week': day_of_week,
+        'target_price': target_price
+    })
     logger.info(f"Created dataset with shape: {df.shape}")
     return df
 
-def calculate_target_price(original_price, days_to_expiry, stock_level, 
+def load_or_create_data(n_samples, seed=42, data_dir='../data'):
+    """
+    Load a cached synthetic dataset, generating and caching it on a miss
+    """
+    # Key the cache by everything that determines the generated rows
+    key = hashlib.sha256(f"{n_samples}:{seed}:{TARGET_RULES_VERSION}".encode()).hexdigest()[:16]
+    path = os.path.join(data_dir, f"synthetic_data_{key}.parquet")
+    
+    if os.path.exists(path):
+        logger.info(f"Loading cached synthetic data from {path}")
+        return pd.read_parquet(path)
+    
+    df = create_synthetic_data(n_samples=n_samples, seed=seed)
+    os.makedirs(data_dir, exist_ok=True)
+    df.to_parquet(path, compression='zstd', index=False)
+    return df
+
+def calculate_target_price(rng, original_price, days_to_expiry, stock_level, 
                           demand_score, category, historical_sales, day_of_week):
     """
     Calculate target price based on intelligent business rules
     This simulates optimal pricing decisions with both increases and decreases
     """
+    # Numba cannot share a Generator, so draw one uniform per rule stage up front
+    return _calculate_target_price_scalar(
+        float(original_price), int(days_to_expiry), int(stock_level), float(demand_score),
+        _CATEGORY_POSITION[category], float(historical_sales), _DAY_POSITION[day_of_week],
+        rng.random(6), rng.normal(1, 0.02)
+    )
+
+@njit
+def _uniform(low, high, u):
+    """Map a pre-drawn [0, 1) sample onto [low, high)"""
+    return low + (high - low) * u
+
+@njit
+def _calculate_target_price_scalar(original_price, days_to_expiry, stock_level, demand_score,
+                                   category_idx, historical_sales, dow_idx, rnd, noise):
+    """Compiled target price rules; category and day are CATEGORIES/DAYS_OF_WEEK indices"""
     price_multiplier = 1.0
     
     # 1. EXPIRY-BASED PRICING (Primary factor for perishables)
     if days_to_expiry <= 0:
         # Expired items - deep discount to clear inventory
-        price_multiplier *= np.random.uniform(0.05, 0.15)  # 85-95% discount
+        price_multiplier *= _uniform(0.05, 0.15, rnd[0])  # 85-95% discount
     elif days_to_expiry <= 1:
         # 1 day to expiry - aggressive discount
-        price_multiplier *= np.random.uniform(0.20, 0.40)  # 60-80% discount
+        price_multiplier *= _uniform(0.20, 0.40, rnd[0])  # 60-80% discount
     elif days_to_expiry <= 2:
         # 2 days to expiry - significant discount
-        price_multiplier *= np.random.uniform(0.40, 0.60)  # 40-60% discount
+        price_multiplier *= _uniform(0.40, 0.60, rnd[0])  # 40-60% discount
     elif days_to_expiry <= 3:
         # 3 days to expiry - moderate discount
-        price_multiplier *= np.random.uniform(0.55, 0.75)  # 25-45% discount
+        price_multiplier *= _uniform(0.55, 0.75, rnd[0])  # 25-45% discount
     elif days_to_expiry <= 5:
         # 5 days to expiry - small discount
-        price_multiplier *= np.random.uniform(0.75, 0.90)  # 10-25% discount
+        price_multiplier *= _uniform(0.75, 0.90, rnd[0])  # 10-25% discount
     elif days_to_expiry <= 7:
         # 1 week to expiry - minimal discount
-        price_multiplier *= np.random.uniform(0.88, 0.98)  # 2-12% discount
+        price_multiplier *= _uniform(0.88, 0.98, rnd[0])  # 2-12% discount
     elif days_to_expiry <= 14:
         # 2 weeks to expiry - neutral to slight variation
-        price_multiplier *= np.random.uniform(0.95, 1.05)  # Small variation
+        price_multiplier *= _uniform(0.95, 1.05, rnd[0])  # Small variation
     elif days_to_expiry <= 21:
         # 3 weeks - fresh, can maintain or increase price
-        price_multiplier *= np.random.uniform(0.98, 1.10)  # Slight premium possible
+        price_multiplier *= _uniform(0.98, 1.10, rnd[0])  # Slight premium possible
     else:
         # Very fresh items (>21 days) - premium pricing opportunity
-        price_multiplier *= np.random.uniform(1.00, 1.15)  # Premium for freshness
+        price_multiplier *= _uniform(1.00, 1.15, rnd[0])  # Premium for freshness
     
     # 2. DEMAND-BASED PRICING (Key revenue optimization)
     if demand_score < 0.1:
         # Very low demand - significant discount needed
-        price_multiplier *= np.random.uniform(0.70, 0.85)  # 15-30% discount
+        price_multiplier *= _uniform(0.70, 0.85, rnd[1])  # 15-30% discount
     elif demand_score < 0.3:
         # Low demand - moderate discount
-        price_multiplier *= np.random.uniform(0.80, 0.95)  # 5-20% discount
+        price_multiplier *= _uniform(0.80, 0.95, rnd[1])  # 5-20% discount
     elif demand_score < 0.5:
         # Below average demand - small discount
-        price_multiplier *= np.random.uniform(0.90, 1.00)  # 0-10% discount
+        price_multiplier *= _uniform(0.90, 1.00, rnd[1])  # 0-10% discount
     elif demand_score < 0.7:
         # Normal demand - maintain or slight increase
-        price_multiplier *= np.random.uniform(0.95, 1.05)  # Small variation
+        price_multiplier *= _uniform(0.95, 1.05, rnd[1])  # Small variation
     elif demand_score < 0.8:
         # Good demand - moderate premium
-        price_multiplier *= np.random.uniform(1.02, 1.12)  # 2-12% premium
+        price_multiplier *= _uniform(1.02, 1.12, rnd[1])  # 2-12% premium
     elif demand_score < 0.9:
         # High demand - significant premium
-        price_multiplier *= np.random.uniform(1.08, 1.20)  # 8-20% premium
+        price_multiplier *= _uniform(1.08, 1.20, rnd[1])  # 8-20% premium
     else:
         # Very high demand - maximum premium
-        price_multiplier *= np.random.uniform(1.15, 1.35)  # 15-35% premium
+        price_multiplier *= _uniform(1.15, 1.35, rnd[1])  # 15-35% premium
     
     # 3. STOCK LEVEL OPTIMIZATION (Supply & Demand balance)
-    stock_ratio = min(stock_level / 100, 5.0)  # Normalize and cap
-    
     if stock_level > 300:
         # Excess inventory - aggressive pricing to move stock
-        price_multiplier *= np.random.uniform(0.75, 0.90)  # 10-25% discount
+        price_multiplier *= _uniform(0.75, 0.90, rnd[2])  # 10-25% discount
     elif stock_level > 200:
         # High inventory - moderate discount
-        price_multiplier *= np.random.uniform(0.85, 0.95)  # 5-15% discount
+        price_multiplier *= _uniform(0.85, 0.95, rnd[2])  # 5-15% discount
     elif stock_level > 100:
         # Above average - small discount
-        price_multiplier *= np.random.uniform(0.92, 1.02)  # Small variation
+        price_multiplier *= _uniform(0.92, 1.02, rnd[2])  # Small variation
     elif stock_level > 50:
         # Normal stock - maintain price
-        price_multiplier *= np.random.uniform(0.98, 1.05)  # Small variation
+        price_multiplier *= _uniform(0.98, 1.05, rnd[2])  # Small variation
     elif stock_level > 20:
         # Low stock - premium pricing
-        price_multiplier *= np.random.uniform(1.05, 1.15)  # 5-15% premium
+        price_multiplier *= _uniform(1.05, 1.15, rnd[2])  # 5-15% premium
     elif stock_level > 10:
         # Very low stock - significant premium
-        price_multiplier *= np.random.uniform(1.12, 1.25)  # 12-25% premium
+        price_multiplier *= _uniform(1.12, 1.25, rnd[2])  # 12-25% premium
     else:
         # Critical stock - scarcity pricing
-        price_multiplier *= np.random.uniform(1.20, 1.50)  # 20-50% premium
+        price_multiplier *= _uniform(1.20, 1.50, rnd[2])  # 20-50% premium
     
     # 4. SALES VELOCITY INFLUENCE
     if historical_sales < 5:
         # Very slow movers - need discount to stimulate sales
-        price_multiplier *= np.random.uniform(0.80, 0.92)  # 8-20% discount
+        price_multiplier *= _uniform(0.80, 0.92, rnd[3])  # 8-20% discount
     elif historical_sales < 20:
         # Slow movers - moderate discount
-        price_multiplier *= np.random.uniform(0.90, 0.98)  # 2-10% discount
+        price_multiplier *= _uniform(0.90, 0.98, rnd[3])  # 2-10% discount
     elif historical_sales > 50:
         # Good sellers - can maintain premium
-        price_multiplier *= np.random.uniform(1.02, 1.08)  # 2-8% premium
+        price_multiplier *= _uniform(1.02, 1.08, rnd[3])  # 2-8% premium
     elif historical_sales > 100:
         # Fast movers - significant premium
-        price_multiplier *= np.random.uniform(1.05, 1.15)  # 5-15% premium
+        price_multiplier *= _uniform(1.05, 1.15, rnd[3])  # 5-15% premium
     elif historical_sales > 200:
         # Top performers - maximum premium
-        price_multiplier *= np.random.uniform(1.10, 1.25)  # 10-25% premium
-    
-    # Historical sales influence
-    if historical_sales < 20:
-        price *= np.random.uniform(0.9, 0.95)  # Slow-moving discount
-    elif historical_sales > 100:
-        price *= np.random.uniform(1.0, 1.05)  # Fast-moving premium
+        price_multiplier *= _uniform(1.10, 1.25, rnd[3])  # 10-25% premium
     
     # Category-specific adjustments
-    category_multipliers = {
-        'dairy': np.random.uniform(0.95, 1.0),
-        'meat': np.random.uniform(0.98, 1.02),
-        'vegetables': np.random.uniform(0.9, 0.95),
-        'fruits': np.random.uniform(0.9, 0.95),
-        'bakery': np.random.uniform(0.85, 0.95),
-        'seafood': np.random.uniform(1.0, 1.05),
-        'other': np.random.uniform(0.95, 1.0)
-    }
-    price *= category_multipliers[category]
+    if category_idx == 0:    # dairy
+        price_multiplier *= _uniform(0.95, 1.0, rnd[4])
+    elif category_idx == 1:  # meat
+        price_multiplier *= _uniform(0.98, 1.02, rnd[4])
+    elif category_idx == 2:  # vegetables
+        price_multiplier *= _uniform(0.9, 0.95, rnd[4])
+    elif category_idx == 3:  # fruits
+        price_multiplier *= _uniform(0.9, 0.95, rnd[4])
+    elif category_idx == 4:  # bakery
+        price_multiplier *= _uniform(0.85, 0.95, rnd[4])
+    elif category_idx == 5:  # seafood
+        price_multiplier *= _uniform(1.0, 1.05, rnd[4])
+    else:                    # other
+        price_multiplier *= _uniform(0.95, 1.0, rnd[4])
     
     # Day of week effect (weekend vs weekday)
-    if day_of_week in ['saturday', 'sunday']:
-        price *= np.random.uniform(1.0, 1.05)  # Weekend premium
-    elif day_of_week == 'monday':
-        price *= np.random.uniform(0.95, 1.0)  # Monday discount
+    if dow_idx >= 5:  # saturday, sunday
+        price_multiplier *= _uniform(1.0, 1.05, rnd[5])  # Weekend premium
+    elif dow_idx == 0:  # monday
+        price_multiplier *= _uniform(0.95, 1.0, rnd[5])  # Monday discount
+    
+    price = original_price * price_multiplier
     
     # Ensure minimum price (5% of original)
     min_price = original_price * 0.05
     price = max(price, min_price)
     
-    # Add some noise
-    noise = np.random.normal(1, 0.02)  # 2% noise
+    # Add some noise (pre-drawn 2% noise)
     price *= noise
     
     return round(price, 2)
 
-def prepare_features(df):
+def _draw_multiplier(rng, ranges, idx):
+    """Draw one uniform multiplier per row from the (low, high) range selected by idx"""
+    low, high = ranges[idx].T
+    return rng.uniform(low, high)
+
+def calculate_target_price_vec(rng, original_price, days_to_expiry, stock_level,
+                               demand_score, cat_idx, historical_sales, dow_idx):
+    """
+    Vectorized calculate_target_price over arrays of products
+    Categories and days of week are passed as indices into CATEGORIES and DAYS_OF_WEEK
+    """
+    historical_sales = np.asarray(historical_sales)
+    
+    # 1. EXPIRY-BASED PRICING (Primary factor for perishables)
+    price_multiplier = _draw_multiplier(
+        rng, EXPIRY_RANGES, np.digitize(days_to_expiry, EXPIRY_BINS, right=True))
+    
+    # 2. DEMAND-BASED PRICING (Key revenue optimization)
+    price_multiplier *= _draw_multiplier(
+        rng, DEMAND_RANGES, np.digitize(demand_score, DEMAND_BINS))
+    
+    # 3. STOCK LEVEL OPTIMIZATION (Supply & Demand balance)
+    price_multiplier *= _draw_multiplier(
+        rng, STOCK_RANGES, np.digitize(stock_level, STOCK_BINS, right=True))
+    
+    # 4. SALES VELOCITY INFLUENCE
+    velocity_idx = np.where(historical_sales > 50, 3, np.digitize(historical_sales, [5, 20]))
+    price_multiplier *= _draw_multiplier(rng, SALES_VELOCITY_RANGES, velocity_idx)
+    
+    # Category-specific adjustments
+    price_multiplier *= _draw_multiplier(rng, CATEGORY_RANGES, cat_idx)
+    
+    # Day of week effect (weekend vs weekday)
+    price_multiplier *= _draw_multiplier(rng, DAY_OF_WEEK_RANGES, dow_idx)
+    
+    price = original_price * price_multiplier
+    
+    # Ensure minimum price (5% of original)
+    price = np.maximum(price, original_price * 0.05)
+    
+    # Add some noise
+    price *= rng.normal(1, 0.02, len(price))  # 2% noise
+    
+    return np.round(price, 2)
+
+def prepare_features(df, native_categorical=False):
     """
-    Prepare features for training
+    Prepare features for training; with native_categorical the label columns
+    are kept as integer codes for XGBoost's categorical splits instead of
+    being one-hot encoded
     """
     logger.info("Preparing features...")
     
     # Define feature columns
     numeric_features = ['current_price', 'days_to_expiry', 'stock_level', 'demand_score', 'historical_sales']
-    categorical_features = ['category', 'day_of_week']
-    
-    # Create preprocessing pipeline
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', StandardScaler(), numeric_features),
-            ('cat', OneHotEncoder(drop='first', sparse_output=False), categorical_features)
-        ])
     
-    # Fit preprocessor and transform data
     X = df.drop('target_price', axis=1)
     y = df['target_price']
     
-    preprocessor.fit(X)
-    X_processed = preprocessor.transform(X)
+    # Fit scaler statistics (population std, zero variance scales by 1)
+    num = X[numeric_features].to_numpy(np.float64)
+    std = num.std(axis=0)
+    std[std == 0] = 1.0
+    
+    preprocessor = {
+        'numeric_features': numeric_features,
+        'mean': num.mean(axis=0),
+        'std': std,
+        'cat_to_idx': dict(CAT_TO_IDX),
+        'dow_to_idx': dict(DOW_TO_IDX),
+        'categorical_encoding': 'native' if native_categorical else 'onehot'
+    }
+    
+    X_processed = transform_features(X, preprocessor)
+    
+    # Get feature names after preprocessing (first label of each column is dropped)
+    if native_categorical:
+        feature_names = numeric_features + ['category', 'day_of_week']
+    else:
+        feature_names = (
+            numeric_features
+            + [f'category_{cat}' for cat in list(preprocessor['cat_to_idx'])[1:]]
+            + [f'day_of_week_{day}' for day in list(preprocessor['dow_to_idx'])[1:]]
+        )
     
-    # Get feature names after preprocessing
-    numeric_feature_names = numeric_features
-    categorical_feature_names = preprocessor.named_transformers_['cat'].get_feature_names_out(categorical_features)
-    feature_names = numeric_feature_names + list(categorical_feature_names)
+    preprocessor['feature_names'] = feature_names
     
     logger.info(f"Prepared {len(feature_names)} features: {feature_names}")
     
     return X_processed, y, preprocessor, feature_names
 
-def train_xgboost_model(df):
+def transform_features(df, preprocessor):
+    """
+    Standard-scale numeric columns and one-hot encode labels (drop-first),
+    or emit label codes for native categorical models, into a float32
+    Fortran-ordered feature matrix
+    """
+    native = preprocessor.get('categorical_encoding') == 'native'
+    num = df[preprocessor['numeric_features']].to_numpy(np.float64)
+    n_num = num.shape[1]
+    if native:
+        n_features = n_num + 2
+    else:
+        n_features = n_num + len(preprocessor['cat_to_idx']) + len(preprocessor['dow_to_idx']) - 2
+    
+    # Write each block straight into a column-major buffer, so no
+    # intermediate row-major stack has to be transposed afterwards
+    X = np.empty((len(df), n_features), dtype=np.float32, order='F')
+    X[:, :n_num] = (num - preprocessor['mean']) / preprocessor['std']
+    
+    pos = n_num
+    for col, key, one_hot in (('category', 'cat_to_idx', CAT_OH), ('day_of_week', 'dow_to_idx', DOW_OH)):
+        mapping = preprocessor[key]
+        idx = df[col].map(mapping)
+        if idx.isna().any():
+            raise ValueError(f"Found unknown category '{df[col][idx.isna()].iloc[0]}' in column '{col}'")
+        if native:
+            X[:, pos] = idx.to_numpy(np.float32)
+            pos += 1
+        else:
+            X[:, pos:pos + len(mapping) - 1] = one_hot[idx.to_numpy(np.intp)]
+            pos += len(mapping) - 1
+    
+    return X
+
+def _categorical_params(preprocessor):
+    """
+    XGBoost arguments marking the label-code columns of a native categorical layout
+    """
+    if preprocessor.get('categorical_encoding') != 'native':
+        return {}
+    return {
+        'enable_categorical': True,
+        'feature_types': ['q'] * len(preprocessor['numeric_features']) + ['c', 'c']
+    }
+
+def train_xgboost_model(df, params=None, native_categorical=False):
     """
-    Train XGBoost model for price prediction
+    Train XGBoost model for price prediction, optionally overriding the
+    default booster parameters (e.g. with tuned values)
     """
     logger.info("Training XGBoost model...")
     
     # Prepare features
-    X, y, preprocessor, feature_names = prepare_features(df)
+    X, y, preprocessor, feature_names = prepare_features(df, native_categorical)
+    categorical_params = _categorical_params(preprocessor)
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42
     )
     
-    # Define XGBoost model
+    # Row sampling returns C-ordered copies; XGBoost's hist builder scans column-wise
+    X_train = np.asfortranarray(X_train, dtype=np.float32)
+    X_test = np.asfortranarray(X_test, dtype=np.float32)
+    y_train = y_train.to_numpy(np.float32)
+    y_test = y_test.to_numpy(np.float32)
+    
+    # Booster parameters shared by the fitted model and cross-validation
+    xgb_params = {
+        'objective': 'reg:squarederror',
+        'tree_method': 'hist',
+        'max_bin': 256,
+        'device': 'cpu',
+        'max_depth': 6,
+        'learning_rate': 0.1,
+        'subsample': 0.8,
+        'colsample_bytree': 0.8
+    }
+    if params:
+        xgb_params.update(params)
+    
+    # Define XGBoost model; early stopping picks the number of boosting rounds
     model = xgb.XGBRegressor(
-        n_estimators=100,
-        max_depth=6,
-        learning_rate=0.1,
-        subsample=0.8,
-        colsample_bytree=0.8,
+        n_estimators=MAX_BOOST_ROUNDS,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        eval_metric='mae',
         random_state=42,
-        n_jobs=-1
+        n_jobs=-1,
+        **categorical_params,
+        **xgb_params
+    )
+    
+    # Hold out a validation split from the training data for early stopping
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=0.1, random_state=42
     )
     
     # Train model
     logger.info("Training model...")
-    model.fit(X_train, y_train)
+    model.fit(
+        np.asfortranarray(X_fit), y_fit,
+        eval_set=[(np.asfortranarray(X_val), y_val)],
+        verbose=False
+    )
+    logger.info(f"Early stopping kept {model.best_iteration + 1} boosting rounds")
     
     # Evaluate model
     train_pred = model.predict(X_train)
     test_pred = model.predict(X_test)
     
-    train_mae = mean_absolute_error(y_train, train_pred)
-    test_mae = mean_absolute_error(y_test, test_pred)
-    train_rmse = np.sqrt(mean_squared_error(y_train, train_pred))
-    test_rmse = np.sqrt(mean_squared_error(y_test, test_pred))
-    train_r2 = r2_score(y_train, train_pred)
-    test_r2 = r2_score(y_test, test_pred)
+    train_mae, train_rmse, train_r2 = regression_metrics(y_train, train_pred)
+    test_mae, test_rmse, test_r2 = regression_metrics(y_test, test_pred)
     
     logger.info(f"Training Results:")
     logger.info(f"Train MAE: {train_mae:.3f}, Test MAE: {test_mae:.3f}")
@@ -302,12 +549,77 @@ def train_xgboost_model(df):
     logger.info("Top 10 Feature Importances:")
     logger.info(feature_importance_df.head(10).to_string(index=False))
     
-    # Cross-validation
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='neg_mean_absolute_error')
-    logger.info(f"Cross-validation MAE: {-cv_scores.mean():.3f} (+/- {cv_scores.std() * 2:.3f})")
+    # Cross-validation on a single DMatrix built once for all folds
+    dtrain = xgb.DMatrix(X_train, label=y_train, **categorical_params)
+    cv_result = xgb.cv(
+        xgb_params, dtrain, num_boost_round=MAX_BOOST_ROUNDS, nfold=5,
+        metrics='mae', seed=42, early_stopping_rounds=EARLY_STOPPING_ROUNDS
+    )
+    cv_mae = cv_result['test-mae-mean'].iloc[-1]
+    cv_std = cv_result['test-mae-std'].iloc[-1]
+    logger.info(f"Cross-validation MAE: {cv_mae:.3f} (+/- {cv_std * 2:.3f}) after {len(cv_result)} rounds")
     
     return model, preprocessor, feature_names
 
+def regression_metrics(y_true, y_pred):
+    """
+    MAE, RMSE and R² from a single residual array
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = y_true - y_pred
+    sq_err = err * err
+    
+    mae = np.abs(err).mean()
+    rmse = np.sqrt(sq_err.mean())
+    centered = y_true - y_true.mean()
+    r2 = 1 - sq_err.sum() / np.dot(centered, centered)
+    
+    return mae, rmse, r2
+
+def tune_hyperparameters(df, n_iter=30, native_categorical=False):
+    """
+    Bayesian search over XGBoost hyperparameters on the training split
+    """
+    # scikit-optimize is only needed when tuning is requested
+    from skopt import BayesSearchCV
+    from skopt.space import Integer, Real
+    
+    logger.info("Tuning hyperparameters...")
+    
+    X, y, preprocessor, _ = prepare_features(df, native_categorical)
+    
+    # Tune on the same training split used for the final model so the test set stays unseen
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train = np.asfortranarray(X_train, dtype=np.float32)
+    y_train = y_train.to_numpy(np.float32)
+    
+    # Split the cores between the concurrent fold fits instead of oversubscribing them
+    search_jobs = 5
+    search = BayesSearchCV(
+        xgb.XGBRegressor(tree_method='hist', max_bin=256, n_estimators=200, random_state=42,
+                         n_jobs=max(1, (os.cpu_count() or 1) // search_jobs),
+                         **_categorical_params(preprocessor)),
+        {
+            'min_child_weight': Real(0.1, 2, prior='log-uniform'),
+            'subsample': Real(0.6, 1),
+            'colsample_bytree': Real(0.6, 1),
+            'gamma': Real(0, 1),
+            'learning_rate': Real(0.03, 0.3, prior='log-uniform'),
+            'max_depth': Integer(4, 10)
+        },
+        n_iter=n_iter,
+        cv=5,
+        scoring='neg_mean_absolute_error',
+        n_jobs=search_jobs,
+        random_state=42
+    )
+    search.fit(X_train, y_train)
+    
+    best_params = dict(search.best_params_)
+    logger.info(f"Best CV MAE: {-search.best_score_:.3f} with {best_params}")
+    
+    return best_params
+
 def save_model_and_data(model, preprocessor, feature_names, df):
     """
     Save trained model, preprocessor, and sample data
@@ -318,27 +630,37 @@ def save_model_and_data(model, preprocessor, feature_names, df):
     os.makedirs('../models', exist_ok=True)
     os.makedirs('../data', exist_ok=True)
     
-    # Save model and preprocessor
-    joblib.dump(model, '../models/xgboost_pricing_model.joblib')
-    joblib.dump(preprocessor, '../models/preprocessor.joblib')
+    # Save model and preprocessor (lz4 decompresses much faster than the zlib default)
+    joblib.dump(model, '../models/xgboost_pricing_model.joblib', compress=('lz4', 3))
+    joblib.dump(preprocessor, '../models/preprocessor.joblib', compress=('lz4', 3))
     joblib.dump(feature_names, '../models/feature_names.joblib')
     
-    # Save sample data
-    df.to_csv('../data/training_data.csv', index=False)
+    # Native XGBoost format: just the trees, portable across XGBoost versions and runtimes.
+    # Keep only the rounds early stopping selected, since plain Booster consumers
+    # predict with every stored tree
+    model.get_booster()[: model.best_iteration + 1].save_model('../models/xgboost_pricing_model.ubj')
+    
+    # Save sample data as columnar Parquet with dictionary-encoded labels
+    df.astype({'category': 'category', 'day_of_week': 'category'}).to_parquet(
+        '../data/training_data.parquet', compression='zstd', index=False
+    )
     
     logger.info("Model, preprocessor, and data saved successfully")
 
-def main():
+def main(tune=False, native_categorical=False):
     """
     Main training function
     """
     logger.info("Starting model training pipeline...")
     
-    # Create synthetic data
-    df = create_synthetic_data(n_samples=15000)
+    # Create synthetic data (reused from disk across re-trainings)
+    df = load_or_create_data(n_samples=15000)
+    
+    # Optionally search for better hyperparameters first
+    params = tune_hyperparameters(df, native_categorical=native_categorical) if tune else None
     
     # Train model
-    model, preprocessor, feature_names = train_xgboost_model(df)
+    model, preprocessor, feature_names = train_xgboost_model(df, params, native_categorical)
     
     # Save everything
     save_model_and_data(model, preprocessor, feature_names, df)
@@ -346,4 +668,10 @@ def main():
     logger.info("Training pipeline completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the dynamic pricing model")
+    parser.add_argument('--tune', action='store_true',
+                        help="run a Bayesian hyperparameter search before training")
+    parser.add_argument('--native-categorical', action='store_true',
+                        help="use XGBoost's native categorical splits instead of one-hot features")
+    args = parser.parse_args()
+    main(tune=args.tune, native_categorical=args.native_categorical)